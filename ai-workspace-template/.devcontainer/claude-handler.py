@@ -3,148 +3,638 @@
 Claude Code wrapper that handles workspace context and file management
 """
 
+import atexit
+import contextlib
+import functools
+import hashlib
 import os
 import json
-import subprocess
+import string
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+# Directories left out of the workspace file tree: VCS data, dependencies and
+# build output, which can hold far more entries than the sources themselves
+TREE_IGNORE = frozenset({"node_modules", ".git", "dist", "build", ".next", "__pycache__"})
+
+# Digest, size and mtime of each scaffold file last written, so a file still as
+# the scaffold left it is not rewritten. Kept under the workspace's .git, where
+# auto-sync never commits it and the file tree never shows it.
+SCAFFOLD_MANIFEST = os.path.join(".git", "scaffold-manifest.json")
+
+# Scaffold directory structure, relative to the project dir; directories that
+# only hold scaffold files are also created from the file paths themselves
+SCAFFOLD_DIRS = (
+    "src",
+    "src/components",
+    "src/components/common",
+    "src/components/layout",
+    "src/components/features",
+    "src/hooks",
+    "src/utils",
+    "src/types",
+    "src/styles",
+    "src/services",
+    "src/contexts",
+    "public",
+)
+
+# The project dir is opened once per scaffold pass as an anchor for *at() calls
+# (O_PATH where the OS has it: the fd is never read, only resolved against)
+PROJECT_DIR_FLAGS = getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_PATH", 0)
+
+# claude-code output is read from its pipes in large chunks to keep syscalls down
+PIPE_BUFFER_SIZE = 128 * 1024
+PIPE_READ_SIZE = 64 * 1024
+
+@functools.cache
+def _encode_text(text):
+    """UTF-8 encode a static scaffold text once, on first use"""
+    return text.encode("utf-8")
+
+@functools.cache
+def _encode_files(files):
+    """UTF-8 encode a scaffold file table of (path, *text parts) once, on first use"""
+    return tuple(
+        (rel_path, *(part.encode("utf-8") for part in parts))
+        for rel_path, *parts in files
+    )
+
+def _write_buffers(fd, buffers):
+    """Write buffers to fd back to back, with a single writev where the OS has it"""
+    if hasattr(os, "writev"):
+        written = os.writev(fd, buffers)
+        if written == sum(len(buffer) for buffer in buffers):
+            return
+        data = b"".join(buffers)[written:]
+    else:
+        data = b"".join(buffers)
+    while data:
+        data = data[os.write(fd, data):]
+
+def _drain_pipe(pipe, buffer):
+    """Append everything read from pipe to buffer until EOF"""
+    with pipe:
+        while True:
+            chunk = pipe.read1(PIPE_READ_SIZE)
+            if not chunk:
+                break
+            buffer.extend(chunk)
+
+def _tree_entries(path, listings=None):
+    """List a directory for the file tree, in reverse name order for the walk stack"""
+    with os.scandir(path) as it:
+        entries = list(it)
+    # The full set of names, so other readers can skip opening files that are not there
+    if listings is not None:
+        listings[path] = frozenset(entry.name for entry in entries)
+    # Hidden entries are skipped, as `tree` does by default
+    return sorted(
+        (entry for entry in entries
+         if not entry.name.startswith(".") and entry.name not in TREE_IGNORE),
+        key=lambda entry: entry.name,
+        reverse=True,
+    )
+
+def _is_dir_fast(entry):
+    """Directory check from the cached d_type; only stats when the filesystem left it unknown"""
+    try:
+        return entry.is_dir(follow_symlinks=False)
+    except OSError:
+        # DT_UNKNOWN fallback stat failed (e.g. entry removed mid-walk)
+        return False
+
+def _scandir_tree(root, listings=None):
+    """Render an indented file tree of root without spawning `tree`"""
+    # Every directory walked is recorded in listings, if given
+    parts = [root]
+    stack = [(entry, 1) for entry in _tree_entries(root, listings)]
+    while stack:
+        entry, depth = stack.pop()
+        # Reuses the entry type scandir already read, so entries are not stat'ed
+        is_dir = _is_dir_fast(entry)
+        parts.append("    " * depth + entry.name + ("/" if is_dir else ""))
+        if is_dir:
+            try:
+                children = _tree_entries(entry.path, listings)
+            except OSError:
+                continue
+            stack.extend((child, depth + 1) for child in children)
+    return "\n".join(parts)
+
 class WorkspaceClaudeHandler:
     def __init__(self):
         self.workspace_root = Path("/workspace")
         self.project_dir = self.workspace_root / "project"
         self.planning_dir = self.workspace_root / "planning"
         self.chat_dir = self.workspace_root / "chat-history"
+        # Project file paths are joined onto this string rather than built as Path objects
+        self._pdir = os.fspath(self.project_dir) + os.sep
+        self._chat_dir_ready = False
+        self._session_date = None
+        self._session_fd = None
+        atexit.register(self._close_session_file)
         
     def get_workspace_context(self):
         """Build context from all workspace files"""
+        # Directory listings gathered during this build only; never reused across calls
+        listings = {}
+        
+        def structure_and_project_files():
+            # The tree walk has already listed project/, so absent key files are skipped
+            return self.get_file_tree(listings), self.get_project_files(listings)
+        
+        # Each source does its own disk I/O, so a slow read no longer stalls the rest
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            structure = executor.submit(structure_and_project_files)
+            planning = executor.submit(self.get_planning_docs)
+            chat = executor.submit(self.get_recent_chat_history)
+            tree, project_files = structure.result()
+            planning_docs = planning.result()
+            recent_chat = chat.result()
+        
         context = {
-            "workspace_structure": self.get_file_tree(),
-            "project_files": self.get_project_files(),
-            "planning_docs": self.get_planning_docs(),
-            "recent_chat": self.get_recent_chat_history()
+            "workspace_structure": tree,
+            "project_files": project_files,
+            "planning_docs": planning_docs,
+            "recent_chat": recent_chat
         }
         return context
     
-    def get_file_tree(self):
+    def get_workspace_context_json(self):
+        """Workspace context as indented JSON for the prompt"""
+        return json.dumps(self.get_workspace_context(), indent=2, ensure_ascii=False)
+    
+    def get_file_tree(self, listings=None):
         """Get complete workspace file structure"""
-        result = subprocess.run(
-            ["tree", "-I", "node_modules|.git", str(self.workspace_root)],
-            capture_output=True, text=True
-        )
-        return result.stdout if result.returncode == 0 else "No file tree available"
+        try:
+            return _scandir_tree(str(self.workspace_root), listings)
+        except OSError:
+            return "No file tree available"
     
-    def get_project_files(self):
+    def get_project_files(self, listings=None):
         """Get current project file contents (key files only)"""
         key_files = ["package.json", "src/App.tsx", "src/index.tsx", "README.md"]
         files = {}
         
         for file_path in key_files:
-            full_path = self.project_dir / file_path
-            if full_path.exists():
-                try:
-                    files[file_path] = full_path.read_text()
-                except:
-                    files[file_path] = "[Binary or unreadable file]"
+            full_path = self._pdir + file_path
+            # A key file missing from the tree walk's listing of its directory
+            # is skipped without trying to open it
+            if listings:
+                dir_path, name = os.path.split(full_path)
+                names = listings.get(dir_path)
+                if names is not None and name not in names:
+                    continue
+            
+            # Open directly rather than exists() + read_text(): saves a stat per file
+            try:
+                with open(full_path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            except OSError:
+                files[file_path] = "[Binary or unreadable file]"
+                continue
+            try:
+                files[file_path] = data.decode("utf-8")
+            except UnicodeDecodeError:
+                files[file_path] = "[Binary or unreadable file]"
         
         return files
     
     def get_planning_docs(self):
         """Get planning documents"""
         docs = {}
-        if self.planning_dir.exists():
-            for doc_file in self.planning_dir.glob("*.md"):
+        try:
+            it = os.scandir(self.planning_dir)
+        except OSError:
+            return docs
+        
+        with it:
+            for entry in it:
+                # Every *.md file, hidden or symlinked ones included, as glob("*.md")
+                # found them; is_file() only stats entries that are symlinks
+                if not entry.name.endswith(".md") or not entry.is_file():
+                    continue
                 try:
-                    docs[doc_file.name] = doc_file.read_text()
-                except:
-                    docs[doc_file.name] = "[Unreadable file]"
+                    with open(entry.path, "rb") as f:
+                        docs[entry.name] = f.read().decode("utf-8", errors="replace")
+                except OSError:
+                    docs[entry.name] = "[Unreadable file]"
         return docs
     
     def get_recent_chat_history(self):
         """Get recent chat history for context"""
-        if not self.chat_dir.exists():
+        # Find the most recent chat file in one pass; session names sort by date
+        try:
+            with os.scandir(self.chat_dir) as it:
+                latest = max(
+                    (entry for entry in it
+                     if entry.name.startswith("session-") and entry.name.endswith(".md")),
+                    key=lambda entry: entry.name,
+                    default=None,
+                )
+        except FileNotFoundError:
             return "No chat history yet"
+        except OSError:
+            # e.g. chat-history is not a directory or cannot be listed
+            return "No chat sessions yet"
         
-        # Get most recent chat file
-        chat_files = sorted(self.chat_dir.glob("session-*.md"))
-        if chat_files:
-            try:
-                return chat_files[-1].read_text()
-            except:
-                return "Could not read recent chat"
-        return "No chat sessions yet"
+        if latest is None:
+            return "No chat sessions yet"
+        try:
+            with open(latest.path, "rb") as f:
+                return f.read().decode("utf-8", errors="replace")
+        except OSError:
+            return "Could not read recent chat"
     
     def save_chat_message(self, role, content):
         """Save chat message to current session"""
-        self.chat_dir.mkdir(exist_ok=True)
+        now = datetime.now()
+        today = now.strftime("%Y-%m-%d")
+        timestamp = now.strftime("%H:%M:%S")
         
-        # Find or create current session file
-        today = datetime.now().strftime("%Y-%m-%d")
-        session_file = self.chat_dir / f"session-{today}.md"
+        if not self._chat_dir_ready:
+            self.chat_dir.mkdir(exist_ok=True)
+            self._chat_dir_ready = True
         
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        message = f"\n## {role.upper()} ({timestamp})\n\n{content}\n"
+        # Keep the current session file open; rotate when the date changes
+        if self._session_fd is None or self._session_date != today:
+            self._close_session_file()
+            self._session_fd = os.open(
+                str(self.chat_dir / f"session-{today}.md"),
+                os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                0o644,
+            )
+            self._session_date = today
         
-        with open(session_file, "a") as f:
-            f.write(message)
+        # One unbuffered append per message; nothing is left sitting in a buffer.
+        # Formatting straight into bytes skips building the str first.
+        message = b"\n## %b (%b)\n\n%b\n" % (
+            role.upper().encode("utf-8"),
+            timestamp.encode("ascii"),
+            content.encode("utf-8"),
+        )
+        os.write(self._session_fd, message)
+    
+    def _close_session_file(self):
+        """Close the open chat session file, if any"""
+        if self._session_fd is not None:
+            os.close(self._session_fd)
+            self._session_fd = None
     
     def create_project_scaffold(self, project_name="React App", description=""):
         """Create a complete file tree scaffold with placeholder files and documentation"""
         print(f"🏗️  Creating project scaffold for: {project_name}")
         
-        # Create directory structure
-        directories = [
-            self.project_dir / "src",
-            self.project_dir / "src/components",
-            self.project_dir / "src/components/common",
-            self.project_dir / "src/components/layout",
-            self.project_dir / "src/components/features",
-            self.project_dir / "src/hooks",
-            self.project_dir / "src/utils",
-            self.project_dir / "src/types",
-            self.project_dir / "src/styles",
-            self.project_dir / "src/services",
-            self.project_dir / "src/contexts",
-            self.project_dir / "public",
+        # Main documentation files
+        files = [
+            ("ARCHITECTURE.md", self._create_architecture_doc(project_name, description)),
+            ("COMPONENTS.md", self._create_components_doc()),
+            ("STYLING.md", self._create_styling_doc()),
+            ("STATE.md", self._create_state_doc()),
         ]
         
-        for dir_path in directories:
-            dir_path.mkdir(parents=True, exist_ok=True)
+        # Component files with documentation
+        files += self._create_component_files()
         
-        # Create main documentation files
-        self._create_architecture_doc(project_name, description)
-        self._create_components_doc()
-        self._create_styling_doc()
-        self._create_state_doc()
+        # Utilities, contexts, types, styles, services and hooks
+        files += self._create_all_scaffold_files()
         
-        # Create component files with documentation
-        self._create_component_files()
+        # Component README
+        files.append(("src/components/README.md", self._create_component_readme()))
         
-        # Create utility and service files
-        self._create_utility_files()
+        # Create every directory the scaffold needs in one pass, then overlap the
+        # independent file writes
+        self._ensure_dirs([*SCAFFOLD_DIRS, *(os.path.dirname(item[0]) for item in files)])
+        self._batch_write(files)
         
-        # Create context files
-        self._create_context_files()
+        print("✅ Project scaffold created successfully!")
+        return True
+    
+    def _ensure_dirs(self, rel_dirs):
+        """Create directories relative to the project dir, each exactly once"""
+        os.makedirs(self._pdir, exist_ok=True)
+        # Missing ancestors are added too, and everything is created shallowest
+        # first, so each directory costs a single mkdir
+        dirs = set()
+        for rel_dir in rel_dirs:
+            while rel_dir and rel_dir not in dirs:
+                dirs.add(rel_dir)
+                rel_dir = os.path.dirname(rel_dir)
         
-        # Create type definitions
-        self._create_type_files()
+        with self._project_dir_at() as (prefix, at):
+            for rel_dir in sorted(dirs, key=len):
+                try:
+                    os.mkdir(prefix + rel_dir, **at)
+                except FileExistsError:
+                    pass
+    
+    @contextlib.contextmanager
+    def _project_dir_at(self):
+        """Yield (path prefix, keyword args) for os calls on project-relative paths"""
+        # Resolving against one open dir fd saves the kernel re-walking the full
+        # path per file; without dir_fd support, paths are joined as strings
+        if not {os.open, os.mkdir, os.stat} <= os.supports_dir_fd:
+            yield self._pdir, {}
+            return
+        dfd = os.open(self._pdir, PROJECT_DIR_FLAGS)
+        try:
+            yield "", {"dir_fd": dfd}
+        finally:
+            os.close(dfd)
+    
+    def _batch_write(self, files):
+        """Write (path relative to project dir, *encoded buffers) tuples in parallel"""
+        manifest = self._load_scaffold_manifest()
+        with self._project_dir_at() as (prefix, at):
+            def on_disk(rel_path):
+                try:
+                    st = os.stat(prefix + rel_path, **at)
+                except OSError:
+                    return None
+                return [st.st_size, st.st_mtime_ns]
+            
+            pending = []
+            for item in files:
+                rel_path, *buffers = item
+                digest = hashlib.blake2b(digest_size=16)
+                for buffer in buffers:
+                    digest.update(buffer)
+                digest = digest.hexdigest()
+                # Skip only a file still exactly as the scaffold wrote it; one the
+                # user has since edited has a new mtime, so it is restored
+                entry = manifest.get(rel_path)
+                if (isinstance(entry, list) and len(entry) == 3
+                        and entry[0] == digest and entry[1:] == on_disk(rel_path)):
+                    continue
+                pending.append((item, digest))
+            
+            if not pending:
+                return
+            
+            def write(job):
+                (rel_path, *buffers), digest = job
+                fd = os.open(prefix + rel_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666, **at)
+                try:
+                    _write_buffers(fd, buffers)
+                    st = os.fstat(fd)
+                finally:
+                    os.close(fd)
+                manifest[rel_path] = [digest, st.st_size, st.st_mtime_ns]
+            
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(write, pending))
         
-        # Create style files
-        self._create_style_files()
+        self._save_scaffold_manifest(manifest)
+    
+    def _load_scaffold_manifest(self):
+        """Read the scaffold manifest (relative path -> [digest, size, mtime]), if any"""
+        try:
+            with open(os.path.join(self.workspace_root, SCAFFOLD_MANIFEST), "rb") as f:
+                manifest = json.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+    
+    def _save_scaffold_manifest(self, manifest):
+        """Replace the scaffold manifest atomically"""
+        path = os.path.join(self.workspace_root, SCAFFOLD_MANIFEST)
+        tmp_path = path + ".tmp"
+        # Only a memo: without a .git to keep it in, every scaffold just rewrites
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+    
+    def _create_architecture_doc(self, project_name, description):
+        """Build ARCHITECTURE.md with overall project structure"""
+        content = ARCHITECTURE_TMPL.safe_substitute(
+            project_name=project_name,
+            description=description or DEFAULT_DESCRIPTION,
+        )
+        return content.encode("utf-8")
+    
+    def _create_components_doc(self):
+        """Build COMPONENTS.md with component hierarchy and relationships"""
+        return _encode_text(COMPONENTS_DOC)
+    
+    def _create_styling_doc(self):
+        """Build STYLING.md with global styles and theme documentation"""
+        return _encode_text(STYLING_DOC)
+    
+    def _create_state_doc(self):
+        """Build STATE.md with data flow and state management documentation"""
+        return _encode_text(STATE_DOC)
+    
+    def _create_component_files(self):
+        """Build placeholder component files (and their CSS modules) with documentation"""
+        return [*_encode_files(COMPONENT_SCAFFOLDS), *_encode_files(COMPONENT_CSS_MODULES)]
+    
+    def _create_all_scaffold_files(self):
+        """Build utility, context, type, style, service and hook files"""
+        return _encode_files(ALL_SCAFFOLD_FILES)
+    
+    def _create_component_readme(self):
+        """Build README for components directory"""
+        return _encode_text(COMPONENT_README)
+    
+    def execute_claude_code(self, user_message):
+        """Execute Claude Code with full workspace context"""
+        # Only this path starts a process, so subprocess is not imported at
+        # module load (nothing else the handler imports pulls it in); the
+        # module is handed to _run_claude_code rather than imported twice
+        import subprocess
         
-        # Create component README
-        self._create_component_readme()
+        # Check if this is a new project that needs scaffolding
+        if self._is_new_project() and self._should_create_scaffold(user_message):
+            project_info = self._extract_project_info(user_message)
+            self.create_project_scaffold(project_info['name'], project_info['description'])
         
-        print("✅ Project scaffold created successfully!")
-        return True
+        # Save user message to chat history
+        self.save_chat_message("user", user_message)
+        
+        # Build context-aware prompt
+        context_json = self.get_workspace_context_json()
+        
+        enhanced_prompt = "".join((PROMPT_PREFIX, context_json, PROMPT_MID, user_message, PROMPT_SUFFIX))
+
+        try:
+            # Execute Claude Code with enhanced context
+            returncode, stdout, stderr = self._run_claude_code(
+                subprocess,
+                enhanced_prompt,
+                timeout=120  # 2 minute timeout
+            )
+            
+            response = stdout if returncode == 0 else f"Error: {stderr}"
+            
+            # Save Claude's response to chat history
+            self.save_chat_message("assistant", response)
+            
+            return {
+                "success": True,
+                "response": response,
+                "context_used": True,
+                "workspace_updated": True
+            }
+            
+        except subprocess.TimeoutExpired as e:
+            return {
+                "success": False,
+                "response": "Request timed out. Please try with a simpler request.",
+                "error": "timeout",
+                "partial_response": e.output
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "response": f"Error executing Claude Code: {str(e)}",
+                "error": str(e)
+            }
     
-    def _create_architecture_doc(self, project_name, description):
-        """Create ARCHITECTURE.md with overall project structure"""
-        content = f"""# {project_name} Architecture
+    def _run_claude_code(self, subprocess, prompt, timeout):
+        """Run claude-code, returning (returncode, stdout, stderr) read from its pipes as it arrives"""
+        cmd = ["claude-code", prompt]
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=str(self.workspace_root),
+            bufsize=PIPE_BUFFER_SIZE
+        )
+        stdout, stderr = bytearray(), bytearray()
+        readers = [
+            threading.Thread(target=_drain_pipe, args=(process.stdout, stdout), daemon=True),
+            threading.Thread(target=_drain_pipe, args=(process.stderr, stderr), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        
+        def timed_out():
+            # Carries whatever output arrived before the deadline
+            return subprocess.TimeoutExpired(
+                cmd, timeout,
+                output=stdout.decode("utf-8", errors="replace"),
+                stderr=stderr.decode("utf-8", errors="replace")
+            )
+        
+        deadline = time.monotonic() + timeout
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            # Pick up whatever was still in the pipes, without hanging on
+            # grandchildren that may keep them open
+            grace = time.monotonic() + 1
+            for reader in readers:
+                reader.join(timeout=max(grace - time.monotonic(), 0))
+            raise timed_out()
+        
+        # claude-code has exited, but a background child of it can still hold
+        # the pipes open; the same deadline covers draining them
+        for reader in readers:
+            reader.join(timeout=max(deadline - time.monotonic(), 0))
+        if any(reader.is_alive() for reader in readers):
+            process.kill()
+            raise timed_out()
+        return (
+            returncode,
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+        )
+    
+    def _is_new_project(self):
+        """Check if this is a new project that needs scaffolding"""
+        # Check if key scaffold files exist
+        architecture_exists = os.path.exists(self._pdir + "ARCHITECTURE.md")
+        components_exists = os.path.exists(self._pdir + "COMPONENTS.md")
+        src_exists = os.path.exists(self._pdir + "src")
+        
+        return not (architecture_exists and components_exists and src_exists)
+    
+    def _should_create_scaffold(self, user_message):
+        """Determine if the user message indicates starting a new project"""
+        keywords = ['build', 'create', 'make', 'start', 'new', 'app', 'application', 'project']
+        message_lower = user_message.lower()
+        return any(keyword in message_lower for keyword in keywords)
+    
+    def _extract_project_info(self, user_message):
+        """Extract project name and description from user message"""
+        # Simple extraction - could be enhanced with better NLP
+        words = user_message.split()
+        
+        # Try to find project name patterns
+        project_name = "React App"
+        description = user_message
+        
+        # Look for patterns like "todo app", "blog site", etc.
+        for i, word in enumerate(words):
+            if word.lower() in ['app', 'application', 'site', 'platform', 'tool']:
+                if i > 0:
+                    project_name = f"{words[i-1].title()} {word.title()}"
+                    break
+        
+        return {
+            'name': project_name,
+            'description': description
+        }
+
+# Static text of the prompt sent to claude-code, around the workspace context
+# JSON and the user message
+
+PROMPT_PREFIX = """
+WORKSPACE CONTEXT:
+"""
+
+PROMPT_MID = """
+
+USER MESSAGE:
+"""
+
+PROMPT_SUFFIX = """
+
+You are operating in a complete development workspace with access to:
+- /workspace/project/ - The React app being built
+- /workspace/planning/ - Requirements and planning documents  
+- /workspace/reference/ - User-uploaded examples and assets
+- /workspace/chat-history/ - Previous conversation history
+
+Please help the user build their React application. You can:
+1. Create/modify files in any workspace directory
+2. Update planning documents as requirements evolve
+3. Reference previous conversations and decisions
+4. Use uploaded reference materials for guidance
+
+IMPORTANT: The project has been scaffolded with:
+- Complete file structure (see ARCHITECTURE.md)
+- All components as placeholder files with documentation comments
+- Global documentation files (COMPONENTS.md, STYLING.md, STATE.md)
+- Each component includes comments about its purpose, props, usage, and styling references
+
+Use this scaffolding to understand the entire application structure and make global changes effectively.
+
+Focus on iterative development - ask clarifying questions and build incrementally.
+"""
+
+# Scaffold documentation templates. Only ARCHITECTURE.md is interpolated (via a
+# string.Template compiled once here) and encoded per scaffold; everything else
+# below is static and is encoded once, the first time a scaffold needs it.
+
+DEFAULT_DESCRIPTION = "A modern React application built with TypeScript and best practices."
+
+ARCHITECTURE_TMPL = string.Template("""# $project_name Architecture
 
 ## Overview
-{description or 'A modern React application built with TypeScript and best practices.'}
+$description
 
 ## Project Structure
 
@@ -227,13 +717,9 @@ Feature-specific components are organized by domain and contain:
    - Unit tests for utilities
    - Component testing
    - Integration tests
-"""
-        
-        (self.project_dir / "ARCHITECTURE.md").write_text(content)
-    
-    def _create_components_doc(self):
-        """Create COMPONENTS.md with component hierarchy and relationships"""
-        content = """# Component Documentation
+""")
+
+COMPONENTS_DOC = """# Component Documentation
 
 ## Component Hierarchy
 
@@ -350,12 +836,8 @@ Every component should have:
 - Use context for cross-component state
 - Document state dependencies
 """
-        
-        (self.project_dir / "COMPONENTS.md").write_text(content)
-    
-    def _create_styling_doc(self):
-        """Create STYLING.md with global styles and theme documentation"""
-        content = """# Styling Guidelines
+
+STYLING_DOC = """# Styling Guidelines
 
 ## Global Theme
 
@@ -569,12 +1051,8 @@ body {
 }
 ```
 """
-        
-        (self.project_dir / "STYLING.md").write_text(content)
-    
-    def _create_state_doc(self):
-        """Create STATE.md with data flow and state management documentation"""
-        content = """# State Management
+
+STATE_DOC = """# State Management
 
 ## Overview
 This application uses a combination of local component state and React Context for global state management.
@@ -758,22 +1236,99 @@ const { data, error, loading, execute } = useAsync(asyncFunction);
 5. On success, update global state
 6. On error, show error message
 """
-        
-        (self.project_dir / "STATE.md").write_text(content)
-    
-    def _create_component_files(self):
-        """Create placeholder component files with documentation"""
-        components = [
-            # Common components
-            {
-                "path": "src/components/common/Button.tsx",
-                "content": """// Button.tsx
+
+COMPONENT_README = """# Components Directory
+
+This directory contains all React components organized by type and feature.
+
+## Structure
+
+```
+components/
+├── common/          # Reusable UI components
+├── layout/          # Layout components
+└── features/        # Feature-specific components
+```
+
+## Component Guidelines
+
+### Creating a New Component
+
+1. **File Structure**
+   ```
+   ComponentName/
+   ├── ComponentName.tsx
+   ├── ComponentName.module.css
+   ├── ComponentName.test.tsx
+   └── index.ts
+   ```
+
+2. **Component Template**
+   ```typescript
+   // ComponentName.tsx
+   // Purpose: [Describe what this component does]
+   // Props: [List main props]
+   // Used in: [Where this component is used]
+   // Global styling: [Reference to STYLING.md if applicable]
+   
+   import React from 'react';
+   import styles from './ComponentName.module.css';
+   
+   interface IComponentNameProps {
+     // Define props here
+   }
+   
+   export const ComponentName: React.FC<IComponentNameProps> = (props) => {
+     // Component implementation
+   };
+   ```
+
+3. **Documentation**
+   - Add inline comments for complex logic
+   - Document all props in the interface
+   - Update COMPONENTS.md when adding new components
+
+## Best Practices
+
+1. **Single Responsibility**: Each component should do one thing well
+2. **Props Documentation**: Use TypeScript interfaces with JSDoc comments
+3. **Accessibility**: Include ARIA labels, roles, and keyboard navigation
+4. **Performance**: Use React.memo for pure components, useMemo for expensive computations
+5. **Testing**: Write tests for all interactive components
+
+## Common Components
+
+See individual component files for detailed documentation:
+- `Button` - Versatile button with multiple variants
+- `Input` - Form input with validation
+- `Card` - Content container
+- `Modal` - Overlay dialog
+- `Loading` - Loading states
+
+## Adding to the Component Library
+
+When creating a new reusable component:
+1. Place it in the `common/` directory
+2. Document it thoroughly
+3. Add it to COMPONENTS.md
+4. Create usage examples
+5. Write comprehensive tests
+"""
+
+# Placeholder components as (path relative to project dir, header comment,
+# source); the two parts are written with a single writev per file
+COMPONENT_SCAFFOLDS = (
+    # Common components
+    (
+        "src/components/common/Button.tsx",
+        """// Button.tsx
 // Purpose: Reusable button component used throughout the app
 // Props: variant (primary|secondary|danger), size (sm|md|lg), disabled, onClick
 // Used in: Header, Forms, Modals, CTAs
 // Global styling: See STYLING.md for button theme variables
 
-import React from 'react';
+""",
+        """import React from 'react';
 import styles from './Button.module.css';
 
 interface IButtonProps {
@@ -807,17 +1362,18 @@ export const Button: React.FC<IButtonProps> = ({
     </button>
   );
 };
-"""
-            },
-            {
-                "path": "src/components/common/Input.tsx",
-                "content": """// Input.tsx
+""",
+    ),
+    (
+        "src/components/common/Input.tsx",
+        """// Input.tsx
 // Purpose: Form input component with validation support
 // Props: type, placeholder, value, onChange, error, label, required
 // Used in: Forms throughout the application
 // Global styling: See STYLING.md for form input styles
 
-import React from 'react';
+""",
+        """import React from 'react';
 import styles from './Input.module.css';
 
 interface IInputProps {
@@ -870,17 +1426,18 @@ export const Input: React.FC<IInputProps> = ({
     </div>
   );
 };
-"""
-            },
-            {
-                "path": "src/components/common/Card.tsx",
-                "content": """// Card.tsx
+""",
+    ),
+    (
+        "src/components/common/Card.tsx",
+        """// Card.tsx
 // Purpose: Content container with consistent styling and shadows
 // Props: title, children, className, onClick
 // Used in: Content sections, Feature displays, Lists
 // Global styling: See STYLING.md for card elevation and spacing
 
-import React from 'react';
+""",
+        """import React from 'react';
 import styles from './Card.module.css';
 
 interface ICardProps {
@@ -913,17 +1470,18 @@ export const Card: React.FC<ICardProps> = ({
     </div>
   );
 };
-"""
-            },
-            {
-                "path": "src/components/common/Modal.tsx",
-                "content": """// Modal.tsx
+""",
+    ),
+    (
+        "src/components/common/Modal.tsx",
+        """// Modal.tsx
 // Purpose: Overlay dialog for focused user interactions
 // Props: isOpen, onClose, title, children, size
 // Used in: Confirmations, Forms, Detail views, Alerts
 // Global styling: See STYLING.md for overlay and modal styles
 
-import React, { useEffect } from 'react';
+""",
+        """import React, { useEffect } from 'react';
 import { createPortal } from 'react-dom';
 import styles from './Modal.module.css';
 
@@ -986,17 +1544,18 @@ export const Modal: React.FC<IModalProps> = ({
     document.body
   );
 };
-"""
-            },
-            {
-                "path": "src/components/common/Loading.tsx",
-                "content": """// Loading.tsx
+""",
+    ),
+    (
+        "src/components/common/Loading.tsx",
+        """// Loading.tsx
 // Purpose: Loading state indicator for async operations
 // Props: size (sm|md|lg), color, text
 // Used in: Data fetching, Form submissions, Route transitions
 // Global styling: See STYLING.md for animation styles
 
-import React from 'react';
+""",
+        """import React from 'react';
 import styles from './Loading.module.css';
 
 interface ILoadingProps {
@@ -1025,19 +1584,20 @@ export const Loading: React.FC<ILoadingProps> = ({
     </div>
   );
 };
-"""
-            },
-            # Layout components
-            {
-                "path": "src/components/layout/Layout.tsx",
-                "content": """// Layout.tsx
+""",
+    ),
+    # Layout components
+    (
+        "src/components/layout/Layout.tsx",
+        """// Layout.tsx
 // Purpose: Main layout wrapper providing consistent page structure
 // Props: children
 // Used in: App root to wrap all pages
 // Contains: Header, Main content area, Footer
 // Global styling: See STYLING.md for layout grid and spacing
 
-import React from 'react';
+""",
+        """import React from 'react';
 import { Header } from './Header';
 import { Footer } from './Footer';
 import styles from './Layout.module.css';
@@ -1061,17 +1621,18 @@ export const Layout: React.FC<ILayoutProps> = ({ children }) => {
     </div>
   );
 };
-"""
-            },
-            {
-                "path": "src/components/layout/Header.tsx",
-                "content": """// Header.tsx
+""",
+    ),
+    (
+        "src/components/layout/Header.tsx",
+        """// Header.tsx
 // Purpose: Application header with navigation and branding
 // Contains: Logo, Navigation menu, User actions
 // State: Current route (from router), User auth status (from context)
 // Global styling: See STYLING.md for header theme
 
-import React from 'react';
+""",
+        """import React from 'react';
 import { useAppState } from '../../contexts/AppStateContext';
 import styles from './Header.module.css';
 
@@ -1095,16 +1656,17 @@ export const Header: React.FC = () => {
     </header>
   );
 };
-"""
-            },
-            {
-                "path": "src/components/layout/Footer.tsx",
-                "content": """// Footer.tsx
+""",
+    ),
+    (
+        "src/components/layout/Footer.tsx",
+        """// Footer.tsx
 // Purpose: Application footer with links and company information
 // Contains: Links, Copyright, Social media icons
 // Global styling: See STYLING.md for footer styles
 
-import React from 'react';
+""",
+        """import React from 'react';
 import styles from './Footer.module.css';
 
 export const Footer: React.FC = () => {
@@ -1127,33 +1689,29 @@ export const Footer: React.FC = () => {
     </footer>
   );
 };
-"""
-            }
-        ]
-        
-        # Create component files
-        for component in components:
-            file_path = self.project_dir / component["path"]
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(component["content"])
-            
-            # Create corresponding CSS module file
-            css_path = file_path.with_suffix('.module.css')
-            css_path.write_text(f"""/* {file_path.stem}.module.css */
-/* Component-specific styles for {file_path.stem} */
+""",
+    ),
+)
+
+# CSS module stub written next to each placeholder component; compiled once like
+# ARCHITECTURE_TMPL, so payloads can gain placeholders without str.format escaping
+CSS_MODULE_TMPL = string.Template("""/* $stem.module.css */
+/* Component-specific styles for $stem */
 /* See STYLING.md for global theme variables */
 
-.container {{
+.container {
   /* Component container styles */
-}}
+}
 """)
-    
-    def _create_utility_files(self):
-        """Create utility function files"""
-        utils = [
-            {
-                "path": "src/utils/helpers.ts",
-                "content": """// helpers.ts
+
+COMPONENT_CSS_MODULES = tuple(
+    (base + ".module.css", CSS_MODULE_TMPL.substitute(stem=os.path.basename(base)))
+    for base in (os.path.splitext(rel_path)[0] for rel_path, *_ in COMPONENT_SCAFFOLDS)
+)
+
+# Utility modules
+UTILITY_FILES = (
+    ("src/utils/helpers.ts", """// helpers.ts
 // Purpose: General utility functions used throughout the app
 // Used in: Components, services, and other utilities
 
@@ -1193,11 +1751,8 @@ export const generateId = (): string => {
 export const capitalize = (str: string): string => {
   return str.charAt(0).toUpperCase() + str.slice(1);
 };
-"""
-            },
-            {
-                "path": "src/utils/validators.ts",
-                "content": """// validators.ts
+"""),
+    ("src/utils/validators.ts", """// validators.ts
 // Purpose: Form validation functions
 // Used in: Form components, Input validation
 
@@ -1242,21 +1797,12 @@ export const composeValidators = (...validators: Array<(value: any) => boolean |
     }
     return undefined;
   };
-"""
-            }
-        ]
-        
-        for util in utils:
-            file_path = self.project_dir / util["path"]
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(util["content"])
-    
-    def _create_context_files(self):
-        """Create React Context files"""
-        contexts = [
-            {
-                "path": "src/contexts/AppStateContext.tsx",
-                "content": """// AppStateContext.tsx
+"""),
+)
+
+# React Context providers
+CONTEXT_FILES = (
+    ("src/contexts/AppStateContext.tsx", """// AppStateContext.tsx
 // Purpose: Global application state management
 // Provides: User state, notifications, preferences
 // Used in: Throughout the app for global state access
@@ -1353,21 +1899,12 @@ export const useAppState = () => {
   }
   return context;
 };
-"""
-            }
-        ]
-        
-        for context in contexts:
-            file_path = self.project_dir / context["path"]
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(context["content"])
-    
-    def _create_type_files(self):
-        """Create TypeScript type definition files"""
-        types = [
-            {
-                "path": "src/types/index.ts",
-                "content": """// index.ts
+"""),
+)
+
+# Shared TypeScript types
+TYPE_FILES = (
+    ("src/types/index.ts", """// index.ts
 // Purpose: Central type definitions used throughout the application
 // Used in: Components, contexts, services
 
@@ -1412,21 +1949,12 @@ export interface PaginatedResponse<T> {
   pageSize: number;
   hasMore: boolean;
 }
-"""
-            }
-        ]
-        
-        for type_file in types:
-            file_path = self.project_dir / type_file["path"]
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(type_file["content"])
-    
-    def _create_style_files(self):
-        """Create global style files"""
-        styles = [
-            {
-                "path": "src/styles/globals.css",
-                "content": """/* globals.css */
+"""),
+)
+
+# Global styles
+STYLE_FILES = (
+    ("src/styles/globals.css", """/* globals.css */
 /* Global styles and CSS reset */
 /* See STYLING.md for theme variables and guidelines */
 
@@ -1482,105 +2010,12 @@ body {
   outline: 2px solid var(--primary-500);
   outline-offset: 2px;
 }
-"""
-            }
-        ]
-        
-        for style in styles:
-            file_path = self.project_dir / style["path"]
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(style["content"])
-    
-    def _create_component_readme(self):
-        """Create README for components directory"""
-        content = """# Components Directory
-
-This directory contains all React components organized by type and feature.
-
-## Structure
-
-```
-components/
-├── common/          # Reusable UI components
-├── layout/          # Layout components
-└── features/        # Feature-specific components
-```
-
-## Component Guidelines
-
-### Creating a New Component
-
-1. **File Structure**
-   ```
-   ComponentName/
-   ├── ComponentName.tsx
-   ├── ComponentName.module.css
-   ├── ComponentName.test.tsx
-   └── index.ts
-   ```
-
-2. **Component Template**
-   ```typescript
-   // ComponentName.tsx
-   // Purpose: [Describe what this component does]
-   // Props: [List main props]
-   // Used in: [Where this component is used]
-   // Global styling: [Reference to STYLING.md if applicable]
-   
-   import React from 'react';
-   import styles from './ComponentName.module.css';
-   
-   interface IComponentNameProps {
-     // Define props here
-   }
-   
-   export const ComponentName: React.FC<IComponentNameProps> = (props) => {
-     // Component implementation
-   };
-   ```
-
-3. **Documentation**
-   - Add inline comments for complex logic
-   - Document all props in the interface
-   - Update COMPONENTS.md when adding new components
-
-## Best Practices
-
-1. **Single Responsibility**: Each component should do one thing well
-2. **Props Documentation**: Use TypeScript interfaces with JSDoc comments
-3. **Accessibility**: Include ARIA labels, roles, and keyboard navigation
-4. **Performance**: Use React.memo for pure components, useMemo for expensive computations
-5. **Testing**: Write tests for all interactive components
-
-## Common Components
-
-See individual component files for detailed documentation:
-- `Button` - Versatile button with multiple variants
-- `Input` - Form input with validation
-- `Card` - Content container
-- `Modal` - Overlay dialog
-- `Loading` - Loading states
+"""),
+)
 
-## Adding to the Component Library
-
-When creating a new reusable component:
-1. Place it in the `common/` directory
-2. Document it thoroughly
-3. Add it to COMPONENTS.md
-4. Create usage examples
-5. Write comprehensive tests
-"""
-        
-        readme_path = self.project_dir / "src/components/README.md"
-        readme_path.parent.mkdir(parents=True, exist_ok=True)
-        readme_path.write_text(content)
-    
-    def _create_service_files(self):
-        """Create service layer files for API integration"""
-        services = [
-            {
-                "path": "src/services/api.ts",
-                "content": """// api.ts
+# API service layer
+SERVICE_FILES = (
+    ("src/services/api.ts", """// api.ts
 // Purpose: Central API client for all backend communications
 // Used in: Components and hooks that need to fetch data
 // Configuration: Base URL and auth headers
@@ -1669,21 +2104,12 @@ class ApiClient {
 }
 
 export const api = new ApiClient();
-"""
-            }
-        ]
-        
-        for service in services:
-            file_path = self.project_dir / service["path"]
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(service["content"])
-    
-    def _create_hook_files(self):
-        """Create custom React hooks"""
-        hooks = [
-            {
-                "path": "src/hooks/useLocalStorage.ts",
-                "content": """// useLocalStorage.ts
+"""),
+)
+
+# Custom React hooks
+HOOK_FILES = (
+    ("src/hooks/useLocalStorage.ts", """// useLocalStorage.ts
 // Purpose: Persist state to localStorage with TypeScript support
 // Used in: Components that need persistent state across sessions
 // Example: Theme preferences, user settings
@@ -1735,11 +2161,8 @@ export function useLocalStorage<T>(
 
   return [storedValue, setValue];
 }
-"""
-            },
-            {
-                "path": "src/hooks/useDebounce.ts",
-                "content": """// useDebounce.ts
+"""),
+    ("src/hooks/useDebounce.ts", """// useDebounce.ts
 // Purpose: Debounce rapidly changing values
 // Used in: Search inputs, form validation, API calls
 // Example: Search suggestions, real-time validation
@@ -1763,139 +2186,21 @@ export function useDebounce<T>(value: T, delay: number): T {
 
   return debouncedValue;
 }
-"""
-            },
-            {
-                "path": "src/hooks/index.ts",
-                "content": """// index.ts
+"""),
+    ("src/hooks/index.ts", """// index.ts
 // Purpose: Export all custom hooks from a single location
 // This makes imports cleaner throughout the application
 
 export { useLocalStorage } from './useLocalStorage';
 export { useDebounce } from './useDebounce';
-"""
-            }
-        ]
-        
-        for hook in hooks:
-            file_path = self.project_dir / hook["path"]
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(hook["content"])
-    
-    def execute_claude_code(self, user_message):
-        """Execute Claude Code with full workspace context"""
-        
-        # Check if this is a new project that needs scaffolding
-        if self._is_new_project() and self._should_create_scaffold(user_message):
-            project_info = self._extract_project_info(user_message)
-            self.create_project_scaffold(project_info['name'], project_info['description'])
-        
-        # Save user message to chat history
-        self.save_chat_message("user", user_message)
-        
-        # Build context-aware prompt
-        context = self.get_workspace_context()
-        
-        enhanced_prompt = f"""
-WORKSPACE CONTEXT:
-{json.dumps(context, indent=2)}
-
-USER MESSAGE:
-{user_message}
-
-You are operating in a complete development workspace with access to:
-- /workspace/project/ - The React app being built
-- /workspace/planning/ - Requirements and planning documents  
-- /workspace/reference/ - User-uploaded examples and assets
-- /workspace/chat-history/ - Previous conversation history
-
-Please help the user build their React application. You can:
-1. Create/modify files in any workspace directory
-2. Update planning documents as requirements evolve
-3. Reference previous conversations and decisions
-4. Use uploaded reference materials for guidance
-
-IMPORTANT: The project has been scaffolded with:
-- Complete file structure (see ARCHITECTURE.md)
-- All components as placeholder files with documentation comments
-- Global documentation files (COMPONENTS.md, STYLING.md, STATE.md)
-- Each component includes comments about its purpose, props, usage, and styling references
-
-Use this scaffolding to understand the entire application structure and make global changes effectively.
-
-Focus on iterative development - ask clarifying questions and build incrementally.
-"""
-
-        try:
-            # Execute Claude Code with enhanced context
-            result = subprocess.run(
-                ["claude-code", enhanced_prompt],
-                capture_output=True,
-                text=True,
-                cwd=str(self.workspace_root),
-                timeout=120  # 2 minute timeout
-            )
-            
-            response = result.stdout if result.returncode == 0 else f"Error: {result.stderr}"
-            
-            # Save Claude's response to chat history
-            self.save_chat_message("assistant", response)
-            
-            return {
-                "success": True,
-                "response": response,
-                "context_used": True,
-                "workspace_updated": True
-            }
-            
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "response": "Request timed out. Please try with a simpler request.",
-                "error": "timeout"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "response": f"Error executing Claude Code: {str(e)}",
-                "error": str(e)
-            }
-    
-    def _is_new_project(self):
-        """Check if this is a new project that needs scaffolding"""
-        # Check if key scaffold files exist
-        architecture_exists = (self.project_dir / "ARCHITECTURE.md").exists()
-        components_exists = (self.project_dir / "COMPONENTS.md").exists()
-        src_exists = (self.project_dir / "src").exists()
-        
-        return not (architecture_exists and components_exists and src_exists)
-    
-    def _should_create_scaffold(self, user_message):
-        """Determine if the user message indicates starting a new project"""
-        keywords = ['build', 'create', 'make', 'start', 'new', 'app', 'application', 'project']
-        message_lower = user_message.lower()
-        return any(keyword in message_lower for keyword in keywords)
-    
-    def _extract_project_info(self, user_message):
-        """Extract project name and description from user message"""
-        # Simple extraction - could be enhanced with better NLP
-        words = user_message.split()
-        
-        # Try to find project name patterns
-        project_name = "React App"
-        description = user_message
-        
-        # Look for patterns like "todo app", "blog site", etc.
-        for i, word in enumerate(words):
-            if word.lower() in ['app', 'application', 'site', 'platform', 'tool']:
-                if i > 0:
-                    project_name = f"{words[i-1].title()} {word.title()}"
-                    break
-        
-        return {
-            'name': project_name,
-            'description': description
-        }
+"""),
+)
+
+# Every static source file in the scaffold as (path relative to project dir,
+# content), one flat table written in a single batch
+ALL_SCAFFOLD_FILES = (
+    UTILITY_FILES + CONTEXT_FILES + TYPE_FILES + STYLE_FILES + SERVICE_FILES + HOOK_FILES
+)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2: